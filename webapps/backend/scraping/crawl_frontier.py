@@ -0,0 +1,271 @@
+import os
+import json
+import heapq
+import argparse
+import datetime
+import multiprocessing
+
+from race_scraper import fetch_race_data
+from runner_scraper import scrape_runner_profile
+
+
+# Configuration
+DATA_DIR = "../../frontend/public/data"
+STATE_DIR = "./state"  # Kept outside DATA_DIR, which is served publicly
+FRONTIER_JSON_PATH = os.path.join(STATE_DIR, "frontier.json")
+CLEANED_RACE_JSON_PATH = os.path.join(DATA_DIR, "cleaned_race.json")
+CLEANED_RUNNER_JSON_PATH = os.path.join(DATA_DIR, "cleaned_runner.json")
+CLEANED_RUNNER_ID_JSON_PATH = os.path.join(DATA_DIR, "cleaned_runner_id.json")
+NUM_PROCESSES = 4  # Number of parallel processes for runner profile scraping
+
+# Default parameters
+DEFAULT_MAX_FETCHES = 20000
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_REFETCH_DAYS = 7
+
+RACE = "race"
+RUNNER = "runner"
+
+
+def race_key(race_id):
+    """Normalise '{uid}.{year}' and '{uid}..{year}' race IDs to the race JSON key '{uid}.{year}'."""
+    parts = [part for part in str(race_id).split(".") if part]
+    if len(parts) != 2 or not all(part.isdigit() for part in parts):
+        return None
+    return f"{parts[0]}.{parts[1]}"
+
+
+def load_json(file_path, default):
+    """Load a JSON file, returning the default when it does not exist."""
+    if not os.path.isfile(file_path):
+        return default
+    with open(file_path, "r") as file:
+        return json.load(file)
+
+
+def save_data(file_path, data):
+    """Save data to a JSON file, replacing it only once fully written."""
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, "w") as file:
+        json.dump(data, file, separators=(",", ":"))
+    os.replace(tmp_path, file_path)
+
+
+def today():
+    return f"{datetime.datetime.now():%Y%m%d}"
+
+
+def add_node(frontier, kind, key, seeded=None):
+    """Add a race/runner to the frontier.
+
+    Each node keeps "h" (number of distinct runner-race links), "y" (latest
+    year it was seen racing) and "f" (date it was last fetched, absent if
+    never). Runner nodes also keep "r", the race keys they are linked with.
+    seeded marks a node as fetched if it has no fetch date yet.
+    Returns True when the key was not in the frontier before.
+    """
+    nodes = frontier[kind]
+    is_new = key not in nodes
+    if is_new:
+        if kind == RACE:
+            nodes[key] = {"h": 0, "y": int(key.split(".")[1])}
+        else:
+            nodes[key] = {"h": 0, "y": 0, "r": []}
+    if seeded and "f" not in nodes[key]:
+        nodes[key]["f"] = seeded
+    return is_new
+
+
+def add_link(frontier, runner_id, key, queue=None, due_date=""):
+    """Record that a runner raced in a race, queueing both nodes when their priority changes.
+
+    The same link seen from the race results and from the runner profile is
+    only counted once. Returns True when the link is new.
+    """
+    add_node(frontier, RUNNER, runner_id)
+    add_node(frontier, RACE, key)
+    runner = frontier[RUNNER][runner_id]
+    race = frontier[RACE][key]
+    if key in runner["r"]:
+        return False
+
+    runner["r"].append(key)
+    runner["h"] = len(runner["r"])
+    runner["y"] = max(runner["y"], race["y"])
+    race["h"] += 1
+
+    if queue is not None:
+        enqueue(frontier, queue, RUNNER, runner_id, due_date)
+        enqueue(frontier, queue, RACE, key, due_date)
+    return True
+
+
+def seed_frontier(frontier):
+    """Merge the cleaned race, runner and runner ID files into the frontier."""
+    seeded = today()
+    num_races, num_runners = len(frontier[RACE]), len(frontier[RUNNER])
+
+    races = load_json(CLEANED_RACE_JSON_PATH, {})
+    for key, race in races.items():
+        key = race_key(key)
+        if not key:
+            continue
+        add_node(frontier, RACE, key, seeded)
+        for result in race.get("Res", []):
+            if result.get("Id"):
+                add_link(frontier, result["Id"], key)
+
+    runners = load_json(CLEANED_RUNNER_JSON_PATH, [])
+    for runner in runners:
+        add_node(frontier, RUNNER, runner["id"], seeded)
+        for race in runner.get("r", []):
+            key = race_key(race.get("Id"))
+            if key:
+                add_link(frontier, runner["id"], key)
+
+    for runner_id in load_json(CLEANED_RUNNER_ID_JSON_PATH, []):
+        add_node(frontier, RUNNER, runner_id)
+
+    print(f"Frontier seeded with {len(frontier[RACE]) - num_races} new races and {len(frontier[RUNNER]) - num_runners} new runners.")
+    return frontier
+
+
+def priority(node):
+    """Never-fetched nodes first, then the oldest fetch, then the most recently active, then the most linked."""
+    return (1 if "f" in node else 0, node.get("f", ""), -node["y"], -node["h"])
+
+
+def get_due_date(refetch_days, now=None):
+    """Return the last fetch date that is due again, i.e. refetch_days ago."""
+    now = now or datetime.datetime.now()
+    return f"{now - datetime.timedelta(days=refetch_days):%Y%m%d}"
+
+
+def is_due(node, due_date):
+    """A node is due if it was never fetched or last fetched on or before due_date."""
+    return node.get("f", "") <= due_date
+
+
+def build_queue(frontier, due_date):
+    """Build a priority heap of all nodes that are due for a fetch."""
+    queue = [
+        (priority(node), kind, key)
+        for kind in (RACE, RUNNER)
+        for key, node in frontier[kind].items()
+        if is_due(node, due_date)
+    ]
+    heapq.heapify(queue)
+    return queue
+
+
+def enqueue(frontier, queue, kind, key, due_date):
+    """Push a node with its current priority if it is due for a fetch."""
+    node = frontier[kind][key]
+    if is_due(node, due_date):
+        heapq.heappush(queue, (priority(node), kind, key))
+
+
+def pop_batch(frontier, queue, batch_size, due_date, fetched):
+    """Pop up to batch_size due nodes and mark them as fetched.
+
+    Heap entries whose priority has since changed are stale and skipped, as
+    the node was pushed again with its new priority.
+    """
+    batch = []
+    while queue and len(batch) < batch_size:
+        entry_priority, kind, key = heapq.heappop(queue)
+        node = frontier[kind][key]
+        if entry_priority == priority(node) and is_due(node, due_date):
+            node["f"] = fetched
+            batch.append((kind, key))
+    return batch
+
+
+def fetch_race(key):
+    """Fetch a race, returning None if the page cannot be scraped."""
+    try:
+        race_uid, year = key.split(".")
+        return fetch_race_data(race_uid, year)
+    except Exception as e:
+        print(f"Failed to scrape race {key}: {e}")
+        return None
+
+
+def fetch_runner(runner_id):
+    """Fetch a runner profile, returning None if the page cannot be scraped."""
+    try:
+        return scrape_runner_profile(runner_id)
+    except Exception as e:
+        print(f"Failed to scrape runner {runner_id}: {e}")
+        return None
+
+
+def crawl(max_fetches, batch_size, refetch_days):
+    """Fetch races and runner profiles from the frontier, following links between them."""
+    os.makedirs(STATE_DIR, exist_ok=True)
+    frontier = load_json(FRONTIER_JSON_PATH, None) or {RACE: {}, RUNNER: {}}
+    seed_frontier(frontier)
+    due_date = get_due_date(refetch_days)
+    queue = build_queue(frontier, due_date)
+    print(f"{len(queue)} races and runners due for fetching.")
+
+    timestamp = f"{datetime.datetime.now():%Y%m%d%H%M%S}"
+    race_json_path = os.path.join(DATA_DIR, "raw_race", f"race_crawl_{timestamp}.json")
+    runner_json_path = os.path.join(DATA_DIR, "raw_runner", f"runner_crawl_{timestamp}.json")
+    runner_id_json_path = os.path.join(DATA_DIR, "raw_runner_id", f"runner_id_crawl_{timestamp}.json")
+
+    races_data, runners_data, new_runner_ids = {}, [], []
+    fetches = 0
+
+    with multiprocessing.Pool(NUM_PROCESSES) as pool:
+        while fetches < max_fetches:
+            # Pages are marked fetched even if scraping fails, so a broken page waits out refetch_days
+            batch = pop_batch(frontier, queue, min(batch_size, max_fetches - fetches), due_date, today())
+            if not batch:
+                break
+            fetches += len(batch)
+
+            for key in [key for kind, key in batch if kind == RACE]:
+                race_data = fetch_race(key)
+                if not race_data:
+                    continue
+                races_data[key] = race_data
+                for result in race_data["Res"]:
+                    runner_id = result.get("Id")
+                    if not runner_id:
+                        continue
+                    if runner_id not in frontier[RUNNER]:
+                        new_runner_ids.append(runner_id)
+                    add_link(frontier, runner_id, key, queue, due_date)
+
+            runner_ids = [key for kind, key in batch if kind == RUNNER]
+            for runner_id, runner in zip(runner_ids, pool.imap(fetch_runner, runner_ids)):
+                if not runner:
+                    continue
+                runners_data.append(runner)
+                for race in runner.get("r", []):
+                    key = race_key(race.get("Id"))
+                    if key:
+                        add_link(frontier, runner_id, key, queue, due_date)
+
+            # Save after every batch so an interrupted crawl keeps its progress
+            save_data(race_json_path, races_data)
+            save_data(runner_json_path, runners_data)
+            save_data(runner_id_json_path, new_runner_ids)
+            save_data(FRONTIER_JSON_PATH, frontier)
+            print(f"Fetched {fetches}/{max_fetches}: {len(races_data)} races, {len(runners_data)} runners, {len(queue)} queued")
+
+    save_data(FRONTIER_JSON_PATH, frontier)
+    print(f"Crawl finished. Races: {len(races_data)}, runners: {len(runners_data)}, new runner IDs: {len(new_runner_ids)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Crawl UTMB races and runners by following links between them.")
+    parser.add_argument("--max_fetches", type=int, default=DEFAULT_MAX_FETCHES, help="Maximum number of pages to fetch. Default 20000")
+    parser.add_argument("--batch_size", type=int, default=DEFAULT_BATCH_SIZE, help="Pages fetched between progress saves. Default 200")
+    parser.add_argument("--refetch_days", type=int, default=DEFAULT_REFETCH_DAYS, help="Days before a fetched page is due again. Default 7")
+
+    args = parser.parse_args()
+    if args.refetch_days < 1:
+        parser.error("--refetch_days must be at least 1")
+    crawl(args.max_fetches, args.batch_size, args.refetch_days)
@@ -51,12 +51,19 @@ def get_page_with_retries(driver, url):
 
 
 def scrape_runner_profile(runner_id):
-    """Scrape profile data for a given runner ID."""
+    """Scrape profile data for a given runner ID, always closing the browser."""
     driver = setup_browser()
+    try:
+        return scrape_runner_page(driver, runner_id)
+    finally:
+        driver.quit()
+
+
+def scrape_runner_page(driver, runner_id):
+    """Scrape profile data for a given runner ID using an open browser."""
     runner_url = f"https://utmb.world/en/runner/{runner_id}"
 
     if not get_page_with_retries(driver, runner_url):
-        driver.quit()
         return None
 
     soup = BeautifulSoup(driver.page_source, "html.parser")
@@ -124,7 +131,6 @@ def scrape_runner_profile(runner_id):
                     "grk": cols[7].text.strip().split(" ")[0], # gender rank
                 })
 
-    driver.quit()
     print(f"Scraped runner: {runner_id}")
 
     # Return only non-empty fields
@@ -0,0 +1,231 @@
+import datetime
+import json
+import os
+
+import pytest
+
+import crawl_frontier
+import runner_scraper
+from crawl_frontier import RACE, RUNNER
+
+
+class SerialPool:
+    """Stand-in for multiprocessing.Pool that runs tasks in-process."""
+
+    def __init__(self, processes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def imap(self, func, iterable):
+        return map(func, iterable)
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    for name in ("raw_race", "raw_runner", "raw_runner_id"):
+        (tmp_path / name).mkdir()
+    monkeypatch.setattr(crawl_frontier, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(crawl_frontier, "STATE_DIR", str(tmp_path / "state"))
+    monkeypatch.setattr(crawl_frontier, "FRONTIER_JSON_PATH", str(tmp_path / "state" / "frontier.json"))
+    monkeypatch.setattr(crawl_frontier, "CLEANED_RACE_JSON_PATH", str(tmp_path / "cleaned_race.json"))
+    monkeypatch.setattr(crawl_frontier, "CLEANED_RUNNER_JSON_PATH", str(tmp_path / "cleaned_runner.json"))
+    monkeypatch.setattr(crawl_frontier, "CLEANED_RUNNER_ID_JSON_PATH", str(tmp_path / "cleaned_runner_id.json"))
+    monkeypatch.setattr(crawl_frontier.multiprocessing, "Pool", SerialPool)
+    return tmp_path
+
+
+def write_json(path, data):
+    with open(path, "w") as file:
+        json.dump(data, file)
+
+
+def empty_frontier():
+    return {RACE: {}, RUNNER: {}}
+
+
+@pytest.mark.parametrize("race_id, expected", [
+    ("123..2024", "123.2024"),
+    ("123.2024", "123.2024"),
+    ("", None),
+    ("a.b", None),
+    (None, None),
+])
+def test_race_key(race_id, expected):
+    assert crawl_frontier.race_key(race_id) == expected
+
+
+def test_seed_frontier(data_dir):
+    write_json(data_dir / "cleaned_race.json", {"1.2023": {"Res": [{"Id": "a"}, {"N": "x", "T": "DNF"}]}})
+    write_json(data_dir / "cleaned_runner.json", [{"id": "a", "r": [{"Id": "1..2023"}, {"Id": "2..2024"}, {"Id": ""}]}])
+    write_json(data_dir / "cleaned_runner_id.json", ["a", "b"])
+
+    frontier = crawl_frontier.seed_frontier(empty_frontier())
+
+    assert set(frontier[RACE]) == {"1.2023", "2.2024"}
+    assert set(frontier[RUNNER]) == {"a", "b"}
+    # The link a -> 1.2023 appears in both the race results and the profile but counts once
+    assert frontier[RACE]["1.2023"]["h"] == 1
+    assert frontier[RUNNER]["a"]["h"] == 2
+    # Seeded runners take their year from their races, as crawled runners do
+    assert frontier[RUNNER]["a"]["y"] == 2024
+    assert "f" in frontier[RACE]["1.2023"] and "f" in frontier[RUNNER]["a"]
+    assert "f" not in frontier[RACE]["2.2024"] and "f" not in frontier[RUNNER]["b"]
+
+
+def test_seed_frontier_merges_without_recounting(data_dir):
+    write_json(data_dir / "cleaned_race.json", {"1.2023": {"Res": [{"Id": "a"}]}})
+    frontier = crawl_frontier.seed_frontier(empty_frontier())
+    frontier[RACE]["1.2023"]["f"] = "20000101"
+
+    write_json(data_dir / "cleaned_race.json", {"1.2023": {"Res": [{"Id": "a"}]}, "2.2024": {"Res": [{"Id": "b"}]}})
+    crawl_frontier.seed_frontier(frontier)
+
+    assert frontier[RACE]["1.2023"] == {"h": 1, "y": 2023, "f": "20000101"}
+    assert frontier[RUNNER]["a"]["h"] == 1
+    assert set(frontier[RACE]) == {"1.2023", "2.2024"}
+    assert "b" in frontier[RUNNER]
+
+
+def test_add_link_deduplicates():
+    frontier = empty_frontier()
+    queue = []
+
+    assert crawl_frontier.add_link(frontier, "a", "1.2023", queue, "99999999")
+    assert not crawl_frontier.add_link(frontier, "a", "1.2023", queue, "99999999")
+
+    assert frontier[RACE]["1.2023"]["h"] == 1
+    assert frontier[RUNNER]["a"]["r"] == ["1.2023"]
+    assert len(queue) == 2
+
+
+def test_pop_batch_skips_stale_entries():
+    frontier = empty_frontier()
+    queue = []
+    crawl_frontier.add_link(frontier, "a", "1.2023", queue, "99999999")
+    crawl_frontier.add_link(frontier, "a", "2.2024", queue, "99999999")
+    frontier[RACE]["1.2023"]["f"] = "99999999"
+
+    batch = crawl_frontier.pop_batch(frontier, queue, 10, "99999999", "20250101")
+
+    # Runner "a" was pushed twice as its priority improved, but is popped once
+    assert sorted(batch) == [(RACE, "2.2024"), (RUNNER, "a")]
+    assert frontier[RUNNER]["a"]["f"] == "20250101"
+    assert not queue
+
+
+def test_pop_batch_orders_by_priority():
+    frontier = empty_frontier()
+    queue = []
+    crawl_frontier.add_link(frontier, "old", "1.2010", queue, "99999999")
+    crawl_frontier.add_link(frontier, "new", "2.2024", queue, "99999999")
+
+    batch = crawl_frontier.pop_batch(frontier, queue, 2, "99999999", "20250101")
+
+    assert batch == [(RACE, "2.2024"), (RUNNER, "new")]
+
+
+def test_pop_batch_rotates_through_due_nodes():
+    frontier = empty_frontier()
+    for i in range(10):
+        crawl_frontier.add_link(frontier, f"r{i}", f"{i}.2026")
+        frontier[RUNNER][f"r{i}"]["f"] = "20260101"
+        frontier[RACE][f"{i}.2026"]["f"] = "20260101"
+    # Make some nodes more linked so they would win every run without the fetch date
+    for i in range(4):
+        crawl_frontier.add_link(frontier, f"r{i}", "99.2026")
+
+    fetched = set()
+    for week in range(1, 7):
+        due_date = "99999999"
+        queue = crawl_frontier.build_queue(frontier, due_date)
+        batch = crawl_frontier.pop_batch(frontier, queue, 4, due_date, f"202602{week:02d}")
+        fetched.update(batch)
+
+    assert fetched == {(kind, key) for kind in (RACE, RUNNER) for key in frontier[kind]}
+
+
+def test_is_due_after_refetch_days():
+    due_date = crawl_frontier.get_due_date(7, datetime.datetime(2026, 1, 8))
+
+    assert due_date == "20260101"
+    assert crawl_frontier.is_due({"h": 0, "y": 0}, due_date)
+    assert crawl_frontier.is_due({"h": 0, "y": 0, "f": "20260101"}, due_date)
+    assert not crawl_frontier.is_due({"h": 0, "y": 0, "f": "20260102"}, due_date)
+
+
+def test_crawl_follows_links(data_dir, monkeypatch):
+    write_json(data_dir / "cleaned_race.json", {"1.2023": {"Res": [{"Id": "a"}]}})
+    monkeypatch.setattr(crawl_frontier, "fetch_race_data", lambda uid, year: {"Res": [{"Id": "b"}]})
+    monkeypatch.setattr(crawl_frontier, "scrape_runner_profile", lambda runner_id: {"id": runner_id, "r": [{"Id": "5..2024"}]})
+
+    crawl_frontier.crawl(10, 2, 7)
+
+    frontier = crawl_frontier.load_json(crawl_frontier.FRONTIER_JSON_PATH, None)
+    assert set(frontier[RACE]) == {"1.2023", "5.2024"}
+    assert set(frontier[RUNNER]) == {"a", "b"}
+    assert all("f" in node for kind in (RACE, RUNNER) for node in frontier[kind].values())
+    runner_id_files = os.listdir(data_dir / "raw_runner_id")
+    assert len(runner_id_files) == 1
+    assert crawl_frontier.load_json(data_dir / "raw_runner_id" / runner_id_files[0], None) == ["b"]
+
+
+def test_crawl_survives_failed_fetch(data_dir, monkeypatch):
+    write_json(data_dir / "cleaned_runner.json", [{"id": "a", "r": [{"Id": "9..2025"}, {"Id": "5..2024"}]}])
+    fetched = []
+
+    def fetch_race_data(race_uid, year):
+        fetched.append(f"{race_uid}.{year}")
+        if race_uid == "9":
+            raise ValueError("invalid literal for int() with base 10: 'DSQ'")
+        return {"Res": []}
+
+    def scrape_runner_profile(runner_id):
+        raise AttributeError("'NoneType' object has no attribute 'text'")
+
+    monkeypatch.setattr(crawl_frontier, "fetch_race_data", fetch_race_data)
+    monkeypatch.setattr(crawl_frontier, "scrape_runner_profile", scrape_runner_profile)
+    write_json(data_dir / "cleaned_runner_id.json", ["b"])
+
+    crawl_frontier.crawl(10, 1, 7)
+    assert fetched == ["9.2025", "5.2024"]
+
+    # A failed page is marked fetched and waits out refetch_days
+    frontier = crawl_frontier.load_json(crawl_frontier.FRONTIER_JSON_PATH, None)
+    assert "f" in frontier[RACE]["9.2025"]
+    assert "f" in frontier[RUNNER]["b"]
+
+    crawl_frontier.crawl(10, 1, 7)
+    assert fetched == ["9.2025", "5.2024"]
+
+
+def test_save_data_replaces_file(tmp_path):
+    path = tmp_path / "frontier.json"
+    crawl_frontier.save_data(path, {"a": 1})
+    crawl_frontier.save_data(path, {"b": 2})
+
+    assert crawl_frontier.load_json(path, None) == {"b": 2}
+    assert os.listdir(tmp_path) == ["frontier.json"]
+
+
+def test_scrape_runner_profile_quits_browser_on_error(monkeypatch):
+    class Driver:
+        quit_called = False
+
+        def quit(self):
+            self.quit_called = True
+
+    driver = Driver()
+    monkeypatch.setattr(runner_scraper, "setup_browser", lambda: driver)
+
+    def scrape_runner_page(driver, runner_id):
+        raise AttributeError("'NoneType' object has no attribute 'text'")
+
+    monkeypatch.setattr(runner_scraper, "scrape_runner_page", scrape_runner_page)
+
+    assert crawl_frontier.fetch_runner("a") is None
+    assert driver.quit_called